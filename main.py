@@ -1,16 +1,15 @@
 import argparse
-from ssh_util.reverse_ssh_linux import ReverseSSHLinux
-from ssh_util.reverse_ssh_registry_linux import ReverseSSHRegistryLinux
 import sys
-import platform
 
 
 
 
 
-def main():
+def _new_parser() -> argparse.ArgumentParser:
     """
-    @overview Command-line interface to configure and start a reverse SSH tunnel.
+    @overview Creates an empty parser holding only the `--help` option (`-h` is taken by `--host`).
+
+    :return {argparse.ArgumentParser}: The parser to which the options of a mode are added.
     """
 
     parser = argparse.ArgumentParser(description="Reverse SSH Tunnel Setup Tool", add_help=False)
@@ -20,104 +19,313 @@ def main():
         help="[ To show the options ]"
     )
 
+    return parser
+
+
+
+def _add_tunnel_arguments(parser:argparse.ArgumentParser):
+    """
+    @overview Adds the options used to set up a reverse SSH tunnel.
+
+    :param parser {argparse.ArgumentParser}: Parser to complete.
+    """
+
     parser.add_argument("--host", "-h", help="Remote SSH host (e.g., ssh.example.com)")
     parser.add_argument("--user", "-u", help="Username to connect to the remote host")
     parser.add_argument("--remote-port", "-rp", type=int, default=1248, help="Remote SSH server port (default: 1248)")
     parser.add_argument("--bind-port", "-bp", type=int, default=8421, help="Remote bind port for the tunnel (default: 8421)")
     parser.add_argument("--local-port", "-lp", type=int, default=1632, help="Local port to forward to (default: 1632)")
 
-    # For the PID associated with the remote bind
+
+
+def _add_list_argument(parser:argparse.ArgumentParser):
+    """
+    @overview Adds the option used to list the reverse SSH tunnels.
+
+    :param parser {argparse.ArgumentParser}: Parser to complete.
+    """
+
     parser.add_argument("--list-tunnel", "-lt", action="store_true", help="List active reverse SSH tunnels")
+
+
+
+def _add_kill_argument(parser:argparse.ArgumentParser):
+    """
+    @overview Adds the option used to kill reverse SSH tunnels.
+
+    :param parser {argparse.ArgumentParser}: Parser to complete.
+    """
+
     parser.add_argument("--kill-tunnel", "-kt", type=int, nargs='+', help="Kill a reverse SSH tunnel by bind port (nargs)")
 
 
-    # There is no argument display `help` to see the options
-    if len(sys.argv) == 1:
-        parser.print_help()
-        sys.exit(0)
 
+def build_help_parser() -> argparse.ArgumentParser:
+    """
+    @overview Builds the parser documenting every option of the tool.
 
-    args = parser.parse_args()
+    :return {argparse.ArgumentParser}: The complete parser.
+    """
+
+    parser = _new_parser()
+    _add_tunnel_arguments(parser)
+
+    # For the PID associated with the remote bind
+    _add_list_argument(parser)
+    _add_kill_argument(parser)
 
+    return parser
 
-    # Linux platform 
-    if platform.system() == "Linux":
-        
-        if args.list_tunnel:
 
-            registry = ReverseSSHRegistryLinux()
-            tunnel_dict = registry.list_ssh_tunnel()
 
-            if not tunnel_dict:
-                print("\n[❗] No active reverse tunnel found")
+def build_list_parser() -> argparse.ArgumentParser:
+    """
+    @overview Builds the parser of the `--list-tunnel` mode.
+
+    :return {argparse.ArgumentParser}: The parser of the mode.
+    """
+
+    parser = _new_parser()
+    _add_list_argument(parser)
+
+    return parser
+
+
+
+def build_kill_parser() -> argparse.ArgumentParser:
+    """
+    @overview Builds the parser of the `--kill-tunnel` mode.
+
+    :return {argparse.ArgumentParser}: The parser of the mode.
+    """
+
+    parser = _new_parser()
+    _add_kill_argument(parser)
+
+    return parser
+
+
 
-            else:
+def build_tunnel_parser() -> argparse.ArgumentParser:
+    """
+    @overview Builds the parser of the tunnel setup mode.
+
+    :return {argparse.ArgumentParser}: The parser of the mode.
+    """
+
+    parser = _new_parser()
+    _add_tunnel_arguments(parser)
 
-                print("\n🔁 Active Reverse Tunnels : ")
+    return parser
 
-                for bind_port, info in tunnel_dict.items():
-                    print(f"    - Bind Port: {bind_port}; Remote: {info['remote_user']}@{info['remote_host']}")
-            
-            sys.exit(0)
 
 
-        if args.kill_tunnel is not None:
+def run_help(args:argparse.Namespace, parser:argparse.ArgumentParser):
+    """
+    @overview Displays the options (there is no argument).
+    """
 
-            registry = ReverseSSHRegistryLinux()
+    parser.print_help()
+    sys.exit(0)
 
-            print("")
 
-            for bind_port in args.kill_tunnel:
-                registry.kill_ssh_tunnel(bind_port)
 
-            sys.exit(0)
+def run_list_tunnel(args:argparse.Namespace, parser:argparse.ArgumentParser):
+    """
+    @overview Lists the active reverse SSH tunnels.
+    """
 
+    from ssh_util.reverse_ssh_registry_linux import ReverseSSHRegistryLinux
 
-        if args.bind_port is not None:
-            
-            registry = ReverseSSHRegistryLinux()
-            tunnel_dict = registry.list_ssh_tunnel()
+    registry = ReverseSSHRegistryLinux()
+    tunnel_dict = registry.list_ssh_tunnel()
 
-            if tunnel_dict:
-                
-                for bind_port, info in tunnel_dict.items():
-                    
-                    if int(bind_port) == int(args.bind_port):
-                        print(f"\n[❗] The bind port {bind_port} is already in use...")
-                        sys.exit(1)
+    if not tunnel_dict:
+        print("\n[❗] No active reverse tunnel found")
 
+    else:
 
-        # Normal tunnel setup flow
-        if not (args.host and args.user):
-            parser.error(f"⛔ The following arguments are required for tunnel creation : --host and --user")
+        print("\n🔁 Active Reverse Tunnels : ")
+
+        for bind_port, info in tunnel_dict.items():
+            print(f"    - Bind Port: {bind_port}; Remote: {info['remote_user']}@{info['remote_host']}")
+
+    sys.exit(0)
+
+
+
+def run_kill_tunnel(args:argparse.Namespace, parser:argparse.ArgumentParser):
+    """
+    @overview Kills the reverse SSH tunnels given by bind port.
+    """
 
+    from ssh_util.reverse_ssh_registry_linux import ReverseSSHRegistryLinux
 
-        # Check internet connection
-        if not ReverseSSHLinux.has_internet_connection():
-            print(f"\n[❗] No internet connection detected. Remote SSH setup cannot proceed")
+    registry = ReverseSSHRegistryLinux()
+
+    print("")
+
+    registry.kill_ssh_tunnels(args.kill_tunnel)
+
+    sys.exit(0)
+
+
+
+def run_tunnel(args:argparse.Namespace, parser:argparse.ArgumentParser):
+    """
+    @overview Configures and starts a reverse SSH tunnel.
+    """
+
+    from ssh_util.reverse_ssh_registry_linux import ReverseSSHRegistryLinux
+
+    if args.bind_port is not None:
+
+        registry = ReverseSSHRegistryLinux()
+
+        if registry.is_ssh_tunnel_active(args.bind_port):
+            print(f"\n[❗] The bind port {args.bind_port} is already in use...")
             sys.exit(1)
 
 
-        ssh_client = ReverseSSHLinux(
-            remote_user=args.user,
-            remote_host=args.host,
-            remote_bind_port=args.bind_port,
-            remote_port=args.remote_port,
-            local_port=args.local_port
-        )
+    # Normal tunnel setup flow
+    if not (args.host and args.user):
+        parser.error(f"⛔ The following arguments are required for tunnel creation : --host and --user")
+
+
+    from ssh_util.reverse_ssh_linux import ReverseSSHLinux
+
+
+    # Check internet connection
+    if not ReverseSSHLinux.has_internet_connection():
+        print(f"\n[❗] No internet connection detected. Remote SSH setup cannot proceed")
+        sys.exit(1)
+
+
+    ssh_client = ReverseSSHLinux(
+        remote_user=args.user,
+        remote_host=args.host,
+        remote_bind_port=args.bind_port,
+        remote_port=args.remote_port,
+        local_port=args.local_port
+    )
+
+    print("\n--- Reverse SSH Setup ---\n")
+
+    try:
+        ssh_client.start_ssh_key_pair_generation_local()  # Overlaps the SSH server checks/installation
+        ssh_client.ensure_ssh_local()
+        ssh_client.generate_ssh_key_pair_local()
+        ssh_client.push_ssh_pubkey_local()
+        ssh_client.start_reverse_ssh_tunnel()
+
+        print("[✅] Reverse SSH tunnel established successfully\n")
+
+    except Exception as err:
+        print(f"[❗] Error : {err}\n")
+
+
+
+# Mode → (parser builder, handler); only the builder of the invoked mode is called
+MODES = {
+    "help": (build_help_parser, run_help),
+    "list": (build_list_parser, run_list_tunnel),
+    "kill": (build_kill_parser, run_kill_tunnel),
+    "tunnel": (build_tunnel_parser, run_tunnel),
+}
+
+# Option → mode it selects
+MODE_FLAGS = {
+    "--list-tunnel": "list",
+    "-lt": "list",
+    "--kill-tunnel": "kill",
+    "-kt": "kill",
+    "--help": "help",
+}
+
+# Every option of the tool (see the `_add_*_argument` helpers), to resolve abbreviations as argparse does
+OPTION_STRINGS = (
+    "--help",
+    "--host", "-h",
+    "--user", "-u",
+    "--remote-port", "-rp",
+    "--bind-port", "-bp",
+    "--local-port", "-lp",
+    "--list-tunnel", "-lt",
+    "--kill-tunnel", "-kt",
+)
+
+
+
+def _peek_mode(argv:list) -> str:
+    """
+    @overview Finds the mode invoked by the command line without parsing it.
+    `--list-tunnel` has priority over `--kill-tunnel`, which has priority over `--help` then the tunnel setup.
+
+    :param argv {list}: Command-line arguments (without the program name).
+
+    :return {str}: Key of the mode in `MODES`.
+    """
+
+    found_modes = set()
+
+
+    if not argv:
+        return "help"
+
+    for arg in argv:
+
+        if arg == "--":
+            break
+
+        option = arg.split("=", 1)[0]
+
+        # Neither an option nor a prefix of one ("-", negative numbers, values)
+        if not option.startswith("-") or len(option) < 2 or option[1:].isdigit():
+            continue
+
+        # Like argparse, a unique prefix of an option (single or double dash, e.g. `-k`) selects it
+        if option in OPTION_STRINGS:
+            matches = [option]
+
+        else:
+            matches = [option_string for option_string in OPTION_STRINGS if option_string.startswith(option)]
+
+        # An ambiguous prefix (e.g. `-l` : `-lt` or `-lp`) is left to the complete parser, which reports it
+        if len(matches) > 1:
+            return "help"
+
+        if matches and matches[0] in MODE_FLAGS:
+            found_modes.add(MODE_FLAGS[matches[0]])
+
+    for mode in ("list", "kill", "help"):
+
+        if mode in found_modes:
+            return mode
+
+    return "tunnel"
+
+
+
+def main():
+    """
+    @overview Command-line interface to configure and start a reverse SSH tunnel.
+    """
+
+    mode = _peek_mode(sys.argv[1:])
+    build_parser, run_mode = MODES[mode]
+
+    parser = build_parser()
+    args = parser.parse_args()
 
-        print("\n--- Reverse SSH Setup ---\n")
 
-        try:
-            ssh_client.ensure_ssh_local()
-            ssh_client.generate_ssh_key_pair_local()
-            ssh_client.push_ssh_pubkey_local()
-            ssh_client.start_reverse_ssh_tunnel()
+    # There is no argument : display the options, whatever the platform
+    if mode == "help":
+        run_mode(args, parser)
 
-            print("[✅] Reverse SSH tunnel established successfully\n")
 
-        except Exception as err:
-            print(f"[❗] Error : {err}\n")
+    # Linux platform (`sys.platform` avoids importing `platform`)
+    if sys.platform.startswith("linux"):
+        run_mode(args, parser)
 
 
 
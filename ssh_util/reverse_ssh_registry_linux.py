@@ -1,9 +1,14 @@
 import os
 import json
 import signal
+import fcntl
+import re
+from contextlib import contextmanager
+from functools import cache
 from pathlib import Path
-import subprocess
-import sys
+
+# Remote forwarding specification of a tunnel process (e.g., `8421:localhost:1632` in its command line)
+TUNNEL_SPEC_PATTERN = re.compile(rb"(?<!\d)(\d+):localhost")
 
 
 
@@ -15,6 +20,11 @@ class ReverseSSHRegistryLinux:
     registered, terminated cleanly. Stores state in a file located at /tmp/.reverse-ssh/reverse_ssh.json (by default).
     """
 
+    # The optional `orjson` module (see `_get_orjson`) is only worth its import time
+    # (it loads `uuid`, `platform`, `zoneinfo`...) for registries of at least this size, in bytes
+    ORJSON_MIN_SIZE = 64 * 1024
+    _ORJSON = None
+
 
     def __init__(self, path:str="/tmp/.reverse-ssh/reverse_ssh.json"):
         """
@@ -26,9 +36,35 @@ class ReverseSSHRegistryLinux:
         self.registry_path = Path(path)
         self.registry_dir = self.registry_path.parent
         self.registry_dir.mkdir(parents=True, exist_ok=True)  # Ensure directory exists
+        self.lock_path = self.registry_dir / f".{self.registry_path.name}.lock"
+
+        # Checked and created under the lock, a concurrent registration can't be overwritten by the empty registry
+        with self._lock_ssh_registry():
+
+            if not self.registry_path.exists():
+                self._write_ssh_registry({})  # Create empty registry if file does not exist
+
+
+
+    @classmethod
+    def _get_orjson(cls):
+        """
+        @overview Returns the `orjson` module, imported on the first call.
+
+        :return {module|None}: The `orjson` module, or `None` if it is not installed.
+        """
+
+        if cls._ORJSON is None:
+
+            try:
+                import orjson
+
+                cls._ORJSON = orjson
+
+            except ImportError:
+                cls._ORJSON = False
 
-        if not self.registry_path.exists():
-            self._write_ssh_registry({})  # Create empty registry if file does not exist
+        return cls._ORJSON or None
 
 
 
@@ -40,11 +76,16 @@ class ReverseSSHRegistryLinux:
         """
 
         try:
-            with open(self.registry_path, "r") as f:
-                return json.load(f)
+            data = self.registry_path.read_bytes()
+            orjson = self._get_orjson() if len(data) >= self.ORJSON_MIN_SIZE else None
+
+            if orjson is not None:
+                return orjson.loads(data)
+
+            return json.loads(data)
             
-        except (json.JSONDecodeError, FileNotFoundError):
-            return {}  # Return empty registry if file is invalid or missing
+        except (json.JSONDecodeError, UnicodeDecodeError, FileNotFoundError):
+            return {}  # Return empty registry if file is invalid or missing (`orjson.JSONDecodeError` is a subclass)
 
 
 
@@ -55,27 +96,185 @@ class ReverseSSHRegistryLinux:
         :param data_dict {dict}: Dictionary to write to the file.
         """
 
-        with open(self.registry_path, "w") as f:
-            json.dump(data_dict, f, indent=4)
+        try:
+            registry_size = self.registry_path.stat().st_size
+
+        except OSError:
+            registry_size = 0
+
+        orjson = self._get_orjson() if registry_size >= self.ORJSON_MIN_SIZE else None
+
+        if orjson is not None:
+            payload = orjson.dumps(data_dict, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+
+        else:
+            payload = json.dumps(data_dict, indent=2).encode()
+
+        # Written beside the registry then renamed, readers never see a partially written file
+        tmp_path = self.registry_path.with_name(f".{self.registry_path.name}.{os.getpid()}.tmp")
+
+        try:
+            tmp_path.write_bytes(payload)
+            os.replace(tmp_path, self.registry_path)
+
+        except OSError:
+            tmp_path.unlink(missing_ok=True)
+            raise
+
+
+
+    @contextmanager
+    def _lock_ssh_registry(self):
+        """
+        @overview Holds an exclusive lock on the registry (sidecar lock file) for a read-modify-write sequence,
+        so that concurrent runs of the tool don't overwrite each other's changes.
+        """
+
+        with open(self.lock_path, "a") as lock_file:
+
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+
+            try:
+                yield
+
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+
+    def _scan_ssh_tunnel_pids(self) -> dict:
+        """
+        @overview Reads the command line of every process (`/proc/<pid>/cmdline`) once and finds the tunnel processes.
+
+        :return {dict}: Dictionary mapping bind ports (as strings) to the PIDs of their tunnel processes.
+        """
+
+        tunnel_pids = {}
+
 
+        for proc_dir in Path("/proc").iterdir():
 
+            if not proc_dir.name.isdigit():
+                continue
 
-    def register_ssh_tunnel(self, bind_port:int, remote_host:str, remote_user:str):
+            try:
+                cmdline = (proc_dir / "cmdline").read_bytes()
+
+            except OSError:
+                continue  # The process has exited meanwhile or is not readable
+
+            for match in TUNNEL_SPEC_PATTERN.finditer(cmdline):
+
+                pid_list = tunnel_pids.setdefault(match.group(1).decode(), [])
+
+                if int(proc_dir.name) not in pid_list:
+                    pid_list.append(int(proc_dir.name))
+
+        return tunnel_pids
+
+
+
+    @staticmethod
+    def _is_ssh_tunnel_process(pid:int, bind_port:str) -> bool:
+        """
+        @overview Checks that a process is alive and is still the tunnel of the given bind port
+        (a recorded PID may have been reused by another process).
+
+        :param pid {int}: PID recorded for the tunnel.
+        :param bind_port {str}: Remote bind port of the tunnel.
+
+        :return {bool}: `True` if the process is the running tunnel, `False` otherwise.
+        """
+
+        try:
+            cmdline = Path(f"/proc/{pid}/cmdline").read_bytes()
+
+        except OSError:
+            return False  # No such process
+
+        return any(match.group(1).decode() == bind_port for match in TUNNEL_SPEC_PATTERN.finditer(cmdline))
+
+
+
+    def _find_ssh_tunnel_pids(self, bind_port:str, metadata:dict, scan_tunnel_pids) -> list:
+        """
+        @overview Returns the PIDs of the tunnel of a bind port : the recorded PID if any,
+        otherwise (entries registered without PID) the result of a scan of the processes.
+
+        :param bind_port {str}: Remote bind port of the tunnel.
+        :param metadata {dict}: Registry entry of the tunnel.
+        :param scan_tunnel_pids {callable}: Memoized `_scan_ssh_tunnel_pids`, run at most once per operation.
+
+        :return {list}: PIDs of the running tunnel (empty if it is not running).
+        """
+
+        pid = metadata.get("pid")
+
+        if pid is not None:
+            return [pid] if self._is_ssh_tunnel_process(pid, bind_port) else []
+
+        return scan_tunnel_pids().get(bind_port, [])
+
+
+
+    @staticmethod
+    def _terminate_ssh_process(pid:int):
+        """
+        @overview Sends SIGTERM to a tunnel process. When the process leads its own process group
+        (`ssh -f` detaches into a new session), the whole group is signalled, so that its helpers don't linger.
+        The process group of the current process is never signalled.
+
+        :param pid {int}: PID of the tunnel process.
+        """
+
+        pgid = os.getpgid(pid)
+
+        if pgid == pid and pgid != os.getpgrp():
+            os.killpg(pgid, signal.SIGTERM)
+
+        else:
+            os.kill(pid, signal.SIGTERM)
+
+        # Reap the process if it is a child of the current one (no zombie left behind)
+        try:
+            os.waitpid(pid, os.WNOHANG)
+
+        except ChildProcessError:
+            pass
+
+
+
+    def register_ssh_tunnel(self, bind_port:int, remote_host:str, remote_user:str, pid:int=None):
         """
         @overview Adds or updates a reverse SSH tunnel entry in the registry.
 
         :param bind_port {int}: Remote bind port used in the reverse tunnel.
         :param remote_host {str}: Remote SSH server address.
         :param remote_user {str}: Username used to connect to the remote server.
+        :param pid {int}: PID of the tunnel process. If not given, it is looked up once here,
+        and recorded when a single process holds the bind port.
         """
 
-        data_dict = self._read_ssh_registry()
-        data_dict[bind_port] = {
-            "remote_host": remote_host,
-            "remote_user": remote_user
-        }
+        if pid is None:
+
+            pid_list = self._scan_ssh_tunnel_pids().get(str(bind_port), [])
+
+            if len(pid_list) == 1:
+                pid = pid_list[0]
 
-        self._write_ssh_registry(data_dict)
+        with self._lock_ssh_registry():
+
+            data_dict = self._read_ssh_registry()
+            data_dict[str(bind_port)] = {
+                "remote_host": remote_host,
+                "remote_user": remote_user
+            }
+
+            # Lets `list_ssh_tunnel` and `kill_ssh_tunnels` check this process directly, without scanning
+            if pid is not None:
+                data_dict[str(bind_port)]["pid"] = pid
+
+            self._write_ssh_registry(data_dict)
 
 
 
@@ -87,35 +286,47 @@ class ReverseSSHRegistryLinux:
         :return {dict}: Dictionary mapping active bind ports to tunnel metadata.
         """
 
-        data_dict = self._read_ssh_registry()
-        active_dict = {}
-
+        with self._lock_ssh_registry():
 
-        for bind_port, metadata in data_dict.items():
+            data_dict = self._read_ssh_registry()
+            scan_tunnel_pids = cache(self._scan_ssh_tunnel_pids)  # At most one pass over the processes
+            active_dict = {}
 
-            try:
 
-                result = subprocess.run(
-                    ["pgrep", "-f", f"{bind_port}:localhost"],
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE
-                )
+            for bind_port, metadata in data_dict.items():
 
-                if result.stdout.strip():  # If there's a PID, the process exists
+                if self._find_ssh_tunnel_pids(bind_port, metadata, scan_tunnel_pids):  # If there's a PID, the process exists
                     active_dict[bind_port] = metadata
 
-            except subprocess.SubprocessError:
-                print(f"[ ⚠️  ] Error checking status of port {bind_port}, assuming inactive")
-                sys.exit(1)
 
+            if active_dict != data_dict:
+                self._write_ssh_registry(active_dict)
+
+            else:
+                return data_dict
 
-        if active_dict != data_dict:
-            self._write_ssh_registry(active_dict)
+            return active_dict
 
-        else:
-            return data_dict
 
-        return active_dict
+
+    def is_ssh_tunnel_active(self, bind_port:int) -> bool:
+        """
+        @overview Checks whether a registered reverse SSH tunnel is running on the given bind port,
+        looking up this entry only (the other tunnels are not checked).
+
+        :param bind_port {int}: Remote bind port to check.
+
+        :return {bool}: `True` if the bind port is registered and its tunnel is running, `False` otherwise.
+        """
+
+        bind_port = str(bind_port)
+        metadata = self._read_ssh_registry().get(bind_port)
+
+
+        if metadata is None:
+            return False
+
+        return bool(self._find_ssh_tunnel_pids(bind_port, metadata, self._scan_ssh_tunnel_pids))
 
 
 
@@ -123,44 +334,51 @@ class ReverseSSHRegistryLinux:
         """
         @overview Terminates the reverse SSH tunnel associated with the given bind port.
         Tries to use `PID` if available, otherwise falls back to searching the SSH process.
+
+        :param bind_port {int}: Remote bind port of the tunnel to kill.
         """
 
-        # Declaration variables
-        data_dict = self._read_ssh_registry()
-        bind_port = str(bind_port)
-        the_pid = []
+        self.kill_ssh_tunnels([bind_port])
 
 
-        try:
 
-            result = subprocess.run(
-                ["pgrep", "-f", f"{bind_port}:localhost"],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                check=True
-            )
+    def kill_ssh_tunnels(self, bind_ports:list):
+        """
+        @overview Terminates the reverse SSH tunnels associated with the given bind ports,
+        with a single scan of the processes and a single read/write of the registry.
+
+        :param bind_ports {list}: Remote bind ports of the tunnels to kill.
+        """
+
+        with self._lock_ssh_registry():
 
-            the_pid = result.stdout.decode().split()
+            # Declaration variables
+            data_dict = self._read_ssh_registry()
+            scan_tunnel_pids = cache(self._scan_ssh_tunnel_pids)  # At most one pass over the processes
 
-            if not the_pid:
-                print(f"[ ⚠️  ] No matching SSH process found for bind port {bind_port}")
 
-            else:
+            for bind_port in map(str, bind_ports):
+
+                the_pid = self._find_ssh_tunnel_pids(bind_port, data_dict.get(bind_port, {}), scan_tunnel_pids)
+
+                if not the_pid:
+                    print(f"[ ⚠️  ] No matching SSH process found for bind port {bind_port}")
+
+                else:
 
-                for found_pid in the_pid:
+                    for found_pid in the_pid:
 
-                    try:
-                        os.kill(int(found_pid), signal.SIGTERM)
-                        print(f"[✅] Killed tunnel with PID {found_pid} (bind port {bind_port})")
+                        try:
+                            self._terminate_ssh_process(found_pid)
+                            print(f"[✅] Killed tunnel with PID {found_pid} (bind port {bind_port})")
 
-                    except ProcessLookupError:
-                        print(f"[ ⚠️  ] Process with PID {found_pid} already gone")
+                        except ProcessLookupError:
+                            print(f"[ ⚠️  ] Process with PID {found_pid} already gone")
 
-        except subprocess.CalledProcessError:
-            print(f"[ ⚠️  ] Failed to find or kill process for bind port {bind_port}")
+                        except PermissionError:
+                            print(f"[ ⚠️  ] Failed to kill process with PID {found_pid} (bind port {bind_port}) : permission denied")
 
-        # In all cases, remove the entry from the registry
-        if bind_port in data_dict:
-            del data_dict[bind_port]
+                # In all cases, remove the entry from the registry
+                data_dict.pop(bind_port, None)
 
-        self._write_ssh_registry(data_dict)
+            self._write_ssh_registry(data_dict)